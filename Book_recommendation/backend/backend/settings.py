@@ -1,6 +1,5 @@
 from pathlib import Path
 import os
-from urllib.parse import urlparse
 from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
@@ -36,6 +35,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'books',
     'rest_framework',
     'rest_framework_simplejwt',
@@ -79,29 +79,24 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 # https://docs.djangoproject.com/en/3.1/ref/settings/#databases
 
 # DATABASES: Single-variable config with DATABASE_URL (Supabase-friendly). In DEBUG, fallback to sqlite.
-DATABASE_URL = (os.getenv('SUPABASE_URL') or '').strip()
-if not DATABASE_URL:
-    raise ImproperlyConfigured('DATABASE_URL is required and must be a Postgres URI from Supabase.')
-
-scheme = DATABASE_URL.split(':', 1)[0]
-if scheme not in {"postgres", "postgresql", "postgresql+psycopg2"}:
-    raise ImproperlyConfigured('DATABASE_URL must start with postgresql:// (not your REST https URL).')
+# Parsing/validation lives in books.db_url so it is memoized and testable in isolation.
+from books.db_url import parse_db_url
 
-parsed = urlparse(DATABASE_URL)
-DB_NAME = parsed.path[1:] if parsed.path.startswith('/') else parsed.path
-if not DB_NAME:
-    raise ImproperlyConfigured('DATABASE_URL is missing the database name (path segment).')
+DATABASE_URL = (os.getenv('SUPABASE_URL') or '').strip()
+db_config = parse_db_url(DATABASE_URL)
 
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
-        'NAME': DB_NAME,
-        'USER': parsed.username or '',
-        'PASSWORD': parsed.password or '',
-        'HOST': parsed.hostname or 'localhost',
-        'PORT': str(parsed.port or '5432'),
+        'NAME': db_config.name,
+        'USER': db_config.user,
+        'PASSWORD': db_config.password,
+        'HOST': db_config.host,
+        'PORT': db_config.port,
         'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '60')),
-        'OPTIONS': {'sslmode': 'require'},
+        # Fail fast when the DB (or PgBouncer in front of it) is unreachable
+        # instead of tying up a worker for the libpq default of ~2 minutes
+        'OPTIONS': {'sslmode': 'require', 'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', '5'))},
     }
 }
 
@@ -229,6 +224,61 @@ EMAIL_TIMEOUT = env_float('EMAIL_TIMEOUT', 20.0)  # smtplib accepts float
 if DEBUG and (not EMAIL_HOST_USER or not EMAIL_HOST_PASSWORD):
     EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
+# Cache: shared Redis when REDIS_URL is set (used for OTP rate limiting and
+# lookup caches); falls back to per-process LocMem for development.
+REDIS_URL = os.getenv('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': REDIS_URL,
+            'OPTIONS': {'CLIENT_CLASS': 'django_redis.client.DefaultClient'},
+        }
+    }
+else:
+    CACHES = {
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    }
+
+# Celery: OTP emails are delivered from a worker, not the request path
+CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+CELERY_TASK_ALWAYS_EAGER = env_bool('CELERY_TASK_ALWAYS_EAGER', False)
+
+# OTP mail is small and latency-sensitive: keep it on its own queue so it never
+# waits behind bulk work. Serve with:
+#   celery -A backend worker -Q otp_email --prefetch-multiplier=1
+CELERY_TASK_ROUTES = {
+    'books.tasks.send_otp_email_task': {'queue': 'otp_email', 'priority': 9},
+    'books.tasks.send_otp_emails_bulk_task': {'queue': 'otp_email'},
+}
+# Ack after the send finishes so a crashed worker doesn't drop an OTP email
+CELERY_TASK_ACKS_LATE = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+# Safety net for mails whose task was lost (broker outage, worker crash,
+# exhausted retries): periodically re-deliver pending EmailOutbox rows
+CELERY_BEAT_SCHEDULE = {
+    'drain-email-outbox': {
+        'task': 'books.tasks.drain_email_outbox',
+        'schedule': env_float('EMAIL_OUTBOX_DRAIN_INTERVAL', 30.0),
+    },
+}
+
+# Logging: the books app logs at INFO by default; raise to DEBUG for the
+# verbose per-import diagnostics in the CSV uploader.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'books': {
+            'handlers': ['console'],
+            'level': os.getenv('BOOKS_LOG_LEVEL', 'INFO'),
+        },
+    },
+}
+
 CSRF_TRUSTED_ORIGINS = os.getenv('CSRF_TRUSTED_ORIGINS')
 if CSRF_TRUSTED_ORIGINS:
     CSRF_TRUSTED_ORIGINS = [o.strip() for o in CSRF_TRUSTED_ORIGINS.split(',') if o.strip()]
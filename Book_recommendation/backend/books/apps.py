@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class BooksConfig(AppConfig):
     name = 'books'
+
+    def ready(self):
+        # Connect cache-invalidation signal handlers
+        from . import caches  # noqa: F401
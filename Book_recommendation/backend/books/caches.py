@@ -0,0 +1,58 @@
+"""
+Small cached lookups for data that changes rarely (the genre taxonomy,
+dashboard aggregates, explorer filter options).
+
+Keys are versioned (_v1) so a payload shape change only needs a bump, and
+every cache is invalidated from model signals rather than waiting out its
+TTL after a write.
+"""
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Book, Genre, User
+
+GENRE_MAP_KEY = 'genre_map_v1'
+GENRE_MAP_TTL = 3600  # seconds
+
+GENRE_LIST_KEY = 'genre_list_v1'
+GENRE_LIST_TTL = 3600  # seconds
+
+DASHBOARD_STATS_KEY = 'dashboard_stats_v1'
+DASHBOARD_STATS_TTL = 120  # seconds
+
+FILTER_OPTIONS_KEY = 'filter_options_v1'
+FILTER_OPTIONS_TTL = 600  # seconds
+
+
+def genre_map():
+    """Return a {name: id} dict for all genres, cached for an hour."""
+    return cache.get_or_set(
+        GENRE_MAP_KEY,
+        lambda: dict(Genre.objects.values_list('name', 'id')),
+        GENRE_MAP_TTL,
+    )
+
+
+def invalidate_genre_caches_after_bulk():
+    # bulk_create bypasses post_save, so the receivers below never fire for
+    # batched genre inserts; callers drop the keys explicitly instead
+    cache.delete_many([GENRE_MAP_KEY, GENRE_LIST_KEY, FILTER_OPTIONS_KEY])
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def _invalidate_genre_caches(sender, **kwargs):
+    cache.delete_many([GENRE_MAP_KEY, GENRE_LIST_KEY, FILTER_OPTIONS_KEY])
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+def _invalidate_book_caches(sender, **kwargs):
+    cache.delete_many([DASHBOARD_STATS_KEY, FILTER_OPTIONS_KEY])
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def _invalidate_user_caches(sender, **kwargs):
+    cache.delete(DASHBOARD_STATS_KEY)
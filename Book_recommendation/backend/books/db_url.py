@@ -0,0 +1,49 @@
+"""
+Parse a DATABASE_URL into the pieces Django's DATABASES dict needs.
+
+Kept separate from settings.py so the validation logic is testable in
+isolation, and memoized so repeated imports (management commands, worker
+forks) reuse the same parsed result.
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+from urllib.parse import urlparse
+
+from django.core.exceptions import ImproperlyConfigured
+
+# Schemes we accept as a Postgres connection URI
+POSTGRES_SCHEMES = {"postgres", "postgresql", "postgresql+psycopg2"}
+
+
+@dataclass(frozen=True)
+class DbConfig:
+    name: str
+    user: str
+    password: str
+    host: str
+    port: str
+
+
+@lru_cache(maxsize=8)
+def parse_db_url(url: str) -> DbConfig:
+    """Validate and parse a Postgres URI into a frozen DbConfig."""
+    url = (url or '').strip()
+    if not url:
+        raise ImproperlyConfigured('DATABASE_URL is required and must be a Postgres URI from Supabase.')
+
+    scheme = url.split(':', 1)[0]
+    if scheme not in POSTGRES_SCHEMES:
+        raise ImproperlyConfigured('DATABASE_URL must start with postgresql:// (not your REST https URL).')
+
+    parsed = urlparse(url)
+    name = parsed.path[1:] if parsed.path.startswith('/') else parsed.path
+    if not name:
+        raise ImproperlyConfigured('DATABASE_URL is missing the database name (path segment).')
+
+    return DbConfig(
+        name=name,
+        user=parsed.username or '',
+        password=parsed.password or '',
+        host=parsed.hostname or 'localhost',
+        port=str(parsed.port or '5432'),
+    )
@@ -19,14 +19,19 @@ class DjongoJSONField(models.JSONField):
         if value is None:
             return value
         
-        # If already a Python object (Djongo case), return as-is
-        if isinstance(value, (list, dict)):
+        # If already a Python object (Djongo case), return as-is.
+        # Exact type check: this is the hot path and avoids the MRO walk.
+        if type(value) in (list, dict):
             return value
-        
-        # If a string (standard SQL backend), parse it
+
+        # If a string (standard SQL backend), parse it. Bare json.loads uses
+        # CPython's C scanner; the cls= path only when a custom decoder is set.
         if isinstance(value, str):
+            decoder = self.decoder
             try:
-                return json.loads(value, cls=self.decoder)
+                if decoder is None:
+                    return json.loads(value)
+                return json.loads(value, cls=decoder)
             except (json.JSONDecodeError, TypeError) as e:
                 raise ValidationError(f"Invalid JSON: {e}")
         
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from books.models import Book
+
+
+class Command(BaseCommand):
+    help = "Delete every Book row. Destructive; requires --yes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--yes',
+            action='store_true',
+            help='Confirm deletion of all books without prompting.',
+        )
+
+    def handle(self, *args, **options):
+        if not options['yes']:
+            raise CommandError(
+                'This deletes every book in the database. Re-run with --yes to confirm.'
+            )
+
+        deleted, _ = Book.objects.all().delete()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} rows"))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from books.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "One-time backfill: copy legacy saved_books M2M rows into the "
+        "saved_book_ids array column for users that still have an empty array."
+    )
+
+    def handle(self, *args, **options):
+        users = list(
+            User.objects.filter(saved_book_ids=[]).prefetch_related('saved_books')
+        )
+
+        to_update = []
+        for user in users:
+            legacy_ids = [b.id for b in user.saved_books.all()]
+            if legacy_ids:
+                user.saved_book_ids = legacy_ids
+                to_update.append(user)
+
+        if to_update:
+            User.objects.bulk_update(to_update, ['saved_book_ids'], batch_size=500)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Migrated saved_book_ids for {len(to_update)} of {len(users)} users"
+        ))
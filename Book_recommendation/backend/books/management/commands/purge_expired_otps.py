@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from books.models import PasswordResetOTP
+
+
+class Command(BaseCommand):
+    help = "Delete expired password-reset OTP rows in bounded batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows deleted per DELETE statement (default 1000).',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        cutoff = timezone.now()
+        total = 0
+
+        # Delete by id slices instead of one unbounded DELETE: each batch
+        # holds its row locks only briefly and keeps the WAL/undo volume per
+        # statement small, so the purge never stalls concurrent resets
+        while True:
+            ids = list(
+                PasswordResetOTP.objects
+                .filter(expires_at__lt=cutoff)
+                .values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            deleted, _ = PasswordResetOTP.objects.filter(id__in=ids).delete()
+            total += deleted
+
+        self.stdout.write(self.style.SUCCESS(f"Purged {total} expired OTP rows"))
@@ -0,0 +1,54 @@
+from django.db import migrations, models
+
+
+def copy_json_genres_to_m2m(apps, schema_editor):
+    """Move the old JSON lists of genre names into the new M2M table."""
+    Book = apps.get_model('books', 'Book')
+    Genre = apps.get_model('books', 'Genre')
+    Through = Book.genres.through
+
+    books = list(Book.objects.exclude(genres_json=[]).values('id', 'genres_json'))
+    if not books:
+        return
+
+    all_names = set()
+    for row in books:
+        all_names.update(n for n in (row['genres_json'] or []) if isinstance(n, str) and n.strip())
+
+    Genre.objects.bulk_create(
+        [Genre(name=n.strip()) for n in all_names], ignore_conflicts=True, batch_size=500
+    )
+    name_to_id = dict(Genre.objects.filter(name__in=all_names).values_list('name', 'id'))
+
+    links = []
+    for row in books:
+        for name in (row['genres_json'] or []):
+            gid = name_to_id.get(str(name).strip())
+            if gid is not None:
+                links.append(Through(book_id=row['id'], genre_id=gid))
+    Through.objects.bulk_create(links, ignore_conflicts=True, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0002_book_indexes'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='book',
+            old_name='genres',
+            new_name='genres_json',
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='genres',
+            field=models.ManyToManyField(blank=True, related_name='books', to='books.Genre'),
+        ),
+        migrations.RunPython(copy_json_genres_to_m2m, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='book',
+            name='genres_json',
+        ),
+    ]
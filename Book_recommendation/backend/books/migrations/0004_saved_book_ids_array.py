@@ -0,0 +1,37 @@
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0003_book_genres_m2m'),
+    ]
+
+    operations = [
+        # jsonb -> integer[] needs an explicit USING cast; '[1, 2]' -> '{1, 2}'
+        migrations.RunSQL(
+            sql=(
+                "ALTER TABLE books_user ALTER COLUMN saved_book_ids TYPE integer[] "
+                "USING translate(saved_book_ids::text, '[]', '{}')::integer[]"
+            ),
+            reverse_sql=(
+                "ALTER TABLE books_user ALTER COLUMN saved_book_ids TYPE jsonb "
+                "USING to_jsonb(saved_book_ids)"
+            ),
+            state_operations=[
+                migrations.AlterField(
+                    model_name='user',
+                    name='saved_book_ids',
+                    field=django.contrib.postgres.fields.ArrayField(
+                        base_field=models.IntegerField(), blank=True, default=list, size=None),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=['saved_book_ids'], name='user_saved_books_gin'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0007_book_trgm_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='passwordresetotp',
+            name='otp_active_idx',
+        ),
+        migrations.AddIndex(
+            model_name='passwordresetotp',
+            index=models.Index(condition=models.Q(is_used=False), fields=['user', '-created_at'],
+                               name='otp_active_idx'),
+        ),
+    ]
@@ -1,10 +1,10 @@
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
 from django.utils import timezone
-import random
-import string
+import secrets
 from datetime import timedelta
-from django.db.models import JSONField
 
 
 class UserManager(BaseUserManager):
@@ -48,9 +48,9 @@ class User(AbstractBaseUser, PermissionsMixin):
     favorite_genres = models.ManyToManyField(Genre, blank=True, related_name="users")
     # Legacy ManyToMany (kept for backward compatibility but no longer written to)
     saved_books = models.ManyToManyField("Book", blank=True, related_name="saved_by_users")
-    # New resilient list of saved book IDs (avoids Djongo failing INSERT translation)
-    # Using custom field that handles both Djongo native lists and JSON strings
-    saved_book_ids = JSONField(default=list)
+    # Native Postgres int array: supports GIN-indexed containment checks and
+    # atomic array_append/array_remove without a read-modify-write cycle
+    saved_book_ids = ArrayField(models.IntegerField(), default=list, blank=True)
 
     # User preferences
     preferred_language = models.CharField(max_length=50, default="English")
@@ -64,6 +64,11 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     objects = UserManager()
 
+    class Meta:
+        indexes = [
+            GinIndex(fields=["saved_book_ids"], name="user_saved_books_gin"),
+        ]
+
     def __str__(self):
         return self.email
 
@@ -74,23 +79,27 @@ class PasswordResetOTP(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     expires_at = models.DateTimeField()
     is_used = models.BooleanField(default=False)
-    
+
+    class Meta:
+        indexes = [
+            # Partial index over active OTPs only: invalidation and verify
+            # queries filter by user with is_used=False, and most rows are
+            # used; created_at makes verify's latest-first fetch index-ordered
+            models.Index(fields=['user', '-created_at'], condition=models.Q(is_used=False),
+                         name='otp_active_idx'),
+            models.Index(fields=['expires_at'], name='otp_expires_idx'),
+        ]
+
     @classmethod
     def generate_otp(cls, user):
-        # Mark any existing OTPs for this user as used.
-        # IMPORTANT: Avoid filtering on is_used=False to prevent Djongo from
-        # generating a NOT boolean SQL clause that it cannot translate.
-        try:
-            cls.objects.filter(user_id=user.id).update(is_used=True)
-        except Exception:
-            # Fallback: iterate and save individually without boolean filter
-            for otp_obj in list(cls.objects.filter(user_id=user.id)):
-                if not otp_obj.is_used:
-                    otp_obj.is_used = True
-                    otp_obj.save()
-        
-        # Generate a 6-digit OTP
-        otp = ''.join(random.choices(string.digits, k=6))
+        # Invalidate any still-active OTPs for this user in one bounded UPDATE.
+        # (The old Djongo per-row fallback is gone; Postgres handles the
+        # boolean WHERE clause fine.)
+        cls.objects.filter(user_id=user.id, is_used=False).update(is_used=True)
+
+        # Generate a 6-digit OTP with a CSPRNG; password-reset codes must not
+        # come from random.Random
+        otp = f"{secrets.randbelow(1_000_000):06d}"
         
         # Set expiry time (10 minutes from now)
         expires_at = timezone.now() + timedelta(minutes=10)
@@ -106,6 +115,28 @@ class PasswordResetOTP(models.Model):
         return f"OTP for {self.user.email} ({self.otp})"
 
 
+class EmailOutbox(models.Model):
+    """Transactional outbox: a mail to deliver, written atomically with the
+    data it references so SMTP downtime never loses it."""
+    recipient = models.EmailField()
+    template = models.CharField(max_length=50)
+    context_json = models.JSONField(default=dict)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt = models.DateTimeField(default=timezone.now)
+    sent = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # The drain query only ever looks at unsent rows due for retry
+            models.Index(fields=['next_attempt'], condition=models.Q(sent=False),
+                         name='outbox_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.template} -> {self.recipient} ({'sent' if self.sent else 'pending'})"
+
+
 class Book(models.Model):
     title = models.CharField(max_length=255, default="")
     author = models.CharField(max_length=255, default="")
@@ -115,7 +146,9 @@ class Book(models.Model):
     publish_date = models.DateField(null=True, blank=True)
     rating = models.FloatField(default=0.0)
     liked_percentage = models.FloatField(default=0.0)
-    genres = JSONField(default=list)    
+    # Real M2M instead of a JSON list of names: enables SQL GROUP BY for
+    # popularity counts and index-backed genre filters
+    genres = models.ManyToManyField(Genre, blank=True, related_name="books")
     language = models.CharField(max_length=50, default="English")
     page_count = models.IntegerField(default=0)
     is_free = models.BooleanField(default=False)
@@ -127,5 +160,16 @@ class Book(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # CSV importer samples order_by('-updated_at')[:5] after every upload
+            models.Index(fields=['-updated_at'], name='book_updated_desc_idx'),
+            # Dashboard top_rated_books sorts on rating
+            models.Index(fields=['rating'], name='book_rating_idx'),
+            # Trigram indexes back search_books' similarity queries
+            GinIndex(fields=['title'], name='book_title_trgm', opclasses=['gin_trgm_ops']),
+            GinIndex(fields=['author'], name='book_author_trgm', opclasses=['gin_trgm_ops']),
+        ]
+
     def __str__(self):
         return f"{self.title} by {self.author}"
@@ -0,0 +1,21 @@
+"""
+Shared DRF permission classes.
+"""
+from rest_framework.permissions import BasePermission
+
+
+class IsAppAdmin(BasePermission):
+    """Allow only application admins.
+
+    Reads the is_admin claim baked into the JWT at login, so the gate costs
+    no query. Tokens minted before the claim existed fall back to the user
+    row (already loaded by authentication) until they are refreshed.
+    """
+    message = "Admin access required"
+
+    def has_permission(self, request, view):
+        token = getattr(request, 'auth', None)
+        if token is not None and 'is_admin' in token:
+            return bool(token['is_admin'])
+        user = request.user
+        return bool(user and user.is_authenticated and user.is_admin)
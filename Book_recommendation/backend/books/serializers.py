@@ -1,13 +1,45 @@
 from rest_framework import serializers
+from .caches import genre_map, invalidate_genre_caches_after_bulk
 from .models import *
 
 class BookSerializer(serializers.ModelSerializer):
-    genres = serializers.ListField(child=serializers.CharField())
+    # Accepts/returns a plain list of genre names so the API shape is unchanged
+    # even though storage is now a Genre M2M; write_only because
+    # to_representation renders the names itself
+    genres = serializers.ListField(child=serializers.CharField(), required=False, write_only=True)
 
     class Meta:
         model = Book
         fields = "__all__"
 
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        data["genres"] = [g.name for g in instance.genres.all()]
+        return data
+
+    def _set_genres(self, book, names):
+        names = [str(n).strip() for n in names if str(n).strip()]
+        existing = {g.name: g for g in Genre.objects.filter(name__in=names)}
+        missing = [n for n in names if n not in existing]
+        if missing:
+            Genre.objects.bulk_create([Genre(name=n) for n in missing], ignore_conflicts=True)
+            existing = {g.name: g for g in Genre.objects.filter(name__in=names)}
+            invalidate_genre_caches_after_bulk()
+        book.genres.set([existing[n] for n in names if n in existing])
+
+    def create(self, validated_data):
+        names = validated_data.pop("genres", [])
+        book = super().create(validated_data)
+        self._set_genres(book, names)
+        return book
+
+    def update(self, instance, validated_data):
+        names = validated_data.pop("genres", None)
+        book = super().update(instance, validated_data)
+        if names is not None:
+            self._set_genres(book, names)
+        return book
+
 class GenreSerializer(serializers.ModelSerializer):
     class Meta:
         model = Genre
@@ -35,17 +67,15 @@ class UserDetailSerializer(serializers.ModelSerializer):
         ]
 
     def get_saved_books(self, obj):
-        # Prefer JSON list; fall back to ManyToMany if empty (one-time migration helper)
+        # Prefer the array column; fall back to the legacy ManyToMany only when
+        # it was prefetched — issuing a fresh query per user here would
+        # reintroduce N+1 on list endpoints. Persisting legacy data belongs to
+        # the migrate_saved_books management command, not a read path.
         if obj.saved_book_ids:
             return list(obj.saved_book_ids)
-        try:
-            legacy_ids = list(obj.saved_books.values_list("id", flat=True))
-            if legacy_ids and not obj.saved_book_ids:
-                obj.saved_book_ids = legacy_ids
-                obj.save(update_fields=["saved_book_ids"])
-            return legacy_ids
-        except Exception:
-            return []
+        if "saved_books" in getattr(obj, "_prefetched_objects_cache", {}):
+            return [b.id for b in obj.saved_books.all()]
+        return []
 
 class UserGenrePreferenceSerializer(serializers.Serializer):
     genres = serializers.ListField(
@@ -55,9 +85,13 @@ class UserGenrePreferenceSerializer(serializers.Serializer):
 
     def update(self, instance, validated_data):
         genre_names = validated_data.get("genres", [])
-        genres = Genre.objects.filter(name__in=genre_names)  # lookup by name
-        instance.favorite_genres.set(genres)
-        instance.save()
+        # Genres change rarely, so resolve names against the cached map
+        # instead of hitting the DB on every preference update
+        name_to_id = genre_map()
+        ids = [name_to_id[n] for n in genre_names if n in name_to_id]
+        # .set() writes the M2M table itself; saving the parent row again
+        # would just be a redundant full-row UPDATE
+        instance.favorite_genres.set(ids)
         return instance
 
 class FavoriteGenreEditSerializer(serializers.Serializer):
@@ -0,0 +1,251 @@
+import logging
+import threading
+from functools import lru_cache
+from smtplib import (
+    SMTPConnectError,
+    SMTPException,
+    SMTPRecipientsRefused,
+    SMTPServerDisconnected,
+)
+from string import Template
+
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.signals import request_finished
+from django.db import transaction
+from django.db.models import F
+from django.dispatch import receiver
+from django.test.signals import setting_changed
+from django.utils import timezone
+
+from .models import EmailOutbox, PasswordResetOTP
+
+logger = logging.getLogger(__name__)
+
+OTP_EMAIL_SUBJECT = "Book Recommendation System - Password Reset OTP"
+
+# One persistent SMTP connection per worker thread: connect+TLS+QUIT per
+# message is the dominant cost of a send
+_connections = threading.local()
+
+
+def _smtp_connection():
+    """Return this thread's open mail connection, reconnecting if stale."""
+    conn = getattr(_connections, 'smtp', None)
+    if conn is not None:
+        smtp = getattr(conn, 'connection', None)
+        if smtp is not None:
+            try:
+                smtp.noop()
+                return conn
+            except Exception:
+                _close_smtp_connection()
+        else:
+            # Non-SMTP backend (console/locmem): safe to reuse as-is
+            return conn
+    conn = get_connection()
+    conn.open()
+    _connections.smtp = conn
+    return conn
+
+
+def _close_smtp_connection():
+    conn = getattr(_connections, 'smtp', None)
+    if conn is not None:
+        try:
+            conn.close()
+        except Exception:
+            pass
+        _connections.smtp = None
+
+
+@receiver(request_finished)
+def close_smtp_connections(sender, **kwargs):
+    # Only relevant when tasks run eagerly on the request thread; workers keep
+    # their connection open across tasks
+    _close_smtp_connection()
+
+
+# The body is three constant chunks around two variables. Splitting once at
+# import and joining per send skips Template's placeholder scan on every call.
+# (Chunks stay str, not bytes: Django's EmailMessage owns MIME/charset
+# encoding and expects text.)
+_OTP_PREFIX, _OTP_MIDDLE, _OTP_SUFFIX = Template("""
+    Hello $first_name,
+
+    We received a request to reset your password for your Book Recommendation System account.
+
+    Your OTP is: $otp
+
+    This OTP is valid for 10 minutes. If you didn't request this, please ignore this email.
+
+    Thank you,
+    Book Recommendation System Team
+    """).safe_substitute(first_name='\x00', otp='\x00').split('\x00')
+
+
+def _render_otp_message(first_name, otp):
+    return ''.join((_OTP_PREFIX, first_name, _OTP_MIDDLE, otp, _OTP_SUFFIX))
+
+
+@lru_cache(maxsize=1)
+def _from_email():
+    # Resolved once per process instead of two LazySettings lookups per send
+    return getattr(settings, 'DEFAULT_FROM_EMAIL', None) or getattr(settings, 'EMAIL_HOST_USER', None)
+
+
+@receiver(setting_changed)
+def _clear_from_email_cache(sender, setting=None, **kwargs):
+    if setting in ('DEFAULT_FROM_EMAIL', 'EMAIL_HOST_USER'):
+        _from_email.cache_clear()
+
+
+# Drain backoff: retry an unsent outbox row after 2**attempts * 30s
+OUTBOX_BACKOFF_BASE = 30  # seconds
+OUTBOX_DRAIN_BATCH = 100
+
+
+def _mark_outbox_sent(outbox_id):
+    if outbox_id is not None:
+        EmailOutbox.objects.filter(id=outbox_id).update(sent=True, attempts=F('attempts') + 1)
+
+
+def _defer_outbox(outbox_id):
+    if outbox_id is None:
+        return
+    row = EmailOutbox.objects.filter(id=outbox_id).only('id', 'attempts').first()
+    if row is not None:
+        delay = OUTBOX_BACKOFF_BASE * (2 ** row.attempts)
+        EmailOutbox.objects.filter(id=outbox_id).update(
+            attempts=F('attempts') + 1,
+            next_attempt=timezone.now() + timedelta(seconds=delay),
+        )
+
+
+# Only connection-level failures are worth retrying from the same worker;
+# anything else either won't improve (bad recipient) or is left to the outbox
+_TRANSIENT_SMTP_ERRORS = (SMTPServerDisconnected, SMTPConnectError)
+
+
+@shared_task(bind=True, autoretry_for=_TRANSIENT_SMTP_ERRORS, retry_backoff=True, max_retries=5)
+def send_otp_email_task(self, user_id, otp_id, outbox_id=None):
+    """Deliver a password-reset OTP email off the request path.
+
+    The OTP row already exists (created synchronously so the HTTP response can
+    confirm it); this task only renders and sends the message, retrying with
+    exponential backoff on SMTP failures. The outbox row is the durable record:
+    it is marked sent on success, and left for drain_email_outbox otherwise.
+    """
+    if outbox_id is not None and EmailOutbox.objects.filter(id=outbox_id, sent=True).exists():
+        logger.debug("send_otp_email_task: outbox id=%s already delivered, skipping", outbox_id)
+        return
+
+    try:
+        # The send needs four OTP columns and two user columns; .only() keeps
+        # the joined SELECT that narrow
+        otp_obj = (PasswordResetOTP.objects.select_related('user')
+                   .only('otp', 'is_used', 'expires_at', 'user__first_name', 'user__email')
+                   .get(id=otp_id, user_id=user_id))
+    except PasswordResetOTP.DoesNotExist:
+        logger.warning("send_otp_email_task: OTP id=%s no longer exists, skipping", otp_id)
+        _mark_outbox_sent(outbox_id)
+        return
+
+    if not otp_obj.is_valid():
+        logger.debug("send_otp_email_task: OTP id=%s already used/expired, skipping", otp_id)
+        _mark_outbox_sent(outbox_id)
+        return
+
+    user = otp_obj.user
+    email = EmailMessage(OTP_EMAIL_SUBJECT, _render_otp_message(user.first_name, otp_obj.otp),
+                         _from_email(), [user.email], connection=_smtp_connection())
+    try:
+        sent_count = email.send(fail_silently=False)
+    except SMTPRecipientsRefused:
+        # Permanent: the server rejected this address; retrying burns quota
+        # without ever delivering. Retire the outbox row.
+        logger.warning("send_otp_email_task: recipient refused for user=%s, not retrying", user.email)
+        _mark_outbox_sent(outbox_id)
+        return
+    except SMTPException:
+        _defer_outbox(outbox_id)
+        raise  # bare raise keeps the original traceback
+    _mark_outbox_sent(outbox_id)
+    logger.debug("send_otp_email_task: send returned count=%s for user=%s", sent_count, user.email)
+
+
+@shared_task
+def drain_email_outbox():
+    """Beat-driven safety net: deliver pending outbox rows whose retry time
+    has passed (lost broker messages, worker crashes, exhausted task retries).
+
+    skip_locked lets concurrent drainers work disjoint batches instead of
+    serializing on the same rows.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        pending = list(
+            EmailOutbox.objects.select_for_update(skip_locked=True)
+            .filter(sent=False, next_attempt__lte=now)
+            .order_by('next_attempt')[:OUTBOX_DRAIN_BATCH]
+        )
+        # Claim the batch inside the lock; actual sends happen after commit so
+        # a slow SMTP server doesn't hold row locks
+        for row in pending:
+            row.attempts += 1
+            row.next_attempt = now + timedelta(seconds=OUTBOX_BACKOFF_BASE * (2 ** row.attempts))
+        EmailOutbox.objects.bulk_update(pending, ['attempts', 'next_attempt'])
+
+    delivered = 0
+    for row in pending:
+        if row.template != 'otp':
+            logger.warning("drain_email_outbox: unknown template %r on row id=%s", row.template, row.id)
+            continue
+        otp_obj = (PasswordResetOTP.objects.select_related('user')
+                   .filter(id=row.context_json.get('otp_id')).first())
+        if otp_obj is None or not otp_obj.is_valid():
+            # Nothing useful left to send; retire the row
+            EmailOutbox.objects.filter(id=row.id).update(sent=True)
+            continue
+        email = EmailMessage(OTP_EMAIL_SUBJECT,
+                             _render_otp_message(otp_obj.user.first_name, otp_obj.otp),
+                             _from_email(), [row.recipient], connection=_smtp_connection())
+        try:
+            email.send(fail_silently=False)
+        except SMTPException:
+            logger.warning("drain_email_outbox: send failed for row id=%s, will retry", row.id)
+            continue
+        EmailOutbox.objects.filter(id=row.id).update(sent=True)
+        delivered += 1
+
+    if pending:
+        logger.info("drain_email_outbox: delivered %s of %s pending rows", delivered, len(pending))
+    return delivered
+
+
+@shared_task(bind=True, autoretry_for=_TRANSIENT_SMTP_ERRORS, retry_backoff=True, max_retries=5)
+def send_otp_emails_bulk_task(self, otp_ids):
+    """Send a batch of OTP emails over a single SMTP session.
+
+    connection.send_messages reuses one session for the whole batch, so N
+    sends cost one connect+TLS handshake instead of N.
+    """
+    otps = (PasswordResetOTP.objects.select_related('user')
+            .only('otp', 'is_used', 'expires_at', 'user__first_name', 'user__email')
+            .filter(id__in=otp_ids))
+    from_email = _from_email()
+
+    messages = [
+        EmailMessage(OTP_EMAIL_SUBJECT, _render_otp_message(o.user.first_name, o.otp),
+                     from_email, [o.user.email])
+        for o in otps if o.is_valid()
+    ]
+    if not messages:
+        return 0
+
+    sent_count = _smtp_connection().send_messages(messages)
+    logger.debug("send_otp_emails_bulk_task: sent %s of %s messages", sent_count, len(messages))
+    return sent_count
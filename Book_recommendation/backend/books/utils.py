@@ -1,54 +1,132 @@
 import logging
-from django.core.mail import send_mail
-from django.conf import settings
-from .models import PasswordResetOTP
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import EmailOutbox, PasswordResetOTP
+from .tasks import send_otp_email_task, send_otp_emails_bulk_task
 
 logger = logging.getLogger(__name__)
 
+# Sliding-window guard: at most OTP_RATE_LIMIT OTPs per user per window
+OTP_RATE_LIMIT = 3
+OTP_RATE_WINDOW = 600  # seconds
+
+# Stampede guard: one worker generates per user at a time; losers reuse the
+# winner's OTP instead of inserting a duplicate row and email
+OTP_LOCK_TTL = 5  # seconds
+OTP_LAST_TTL = 600  # seconds
+
+
+class OTPRateLimited(Exception):
+    """Raised when a user requests OTPs faster than the allowed window."""
+
+
+def rate_limited(scope, ident, limit, window):
+    """Windowed counter over the shared cache; True once `ident` exceeds
+    `limit` events in `window` seconds for the given scope.
+
+    cache.add maps to an atomic SET NX, so concurrent requests cannot both
+    start a window; the check costs one cache round-trip before any DB work.
+    """
+    key = f"rl:{scope}:{str(ident).strip().lower()}"
+    if cache.add(key, 1, window):
+        return False
+    try:
+        count = cache.incr(key)
+    except ValueError:
+        # Key expired between add and incr; start a fresh window
+        cache.add(key, 1, window)
+        return False
+    return count > limit
+
+
+def _check_otp_rate_limit(user_id):
+    """Bump the per-user counter and raise before any DB/SMTP work if over."""
+    if rate_limited('otp-user', user_id, OTP_RATE_LIMIT, OTP_RATE_WINDOW):
+        raise OTPRateLimited(
+            f"OTP limit of {OTP_RATE_LIMIT} per {OTP_RATE_WINDOW}s reached for user {user_id}"
+        )
+
+
 def send_otp_email(user):
     """
-    Generate an OTP for password reset and send it via email
-    
+    Generate an OTP for password reset and queue its delivery email.
+
+    The OTP row is created synchronously so callers can confirm it exists;
+    the SMTP conversation happens in a Celery task so the request path never
+    blocks on the mail server.
+
     Args:
         user: User model instance
-    
+
     Returns:
         PasswordResetOTP instance
     """
-    # Generate OTP
-    otp_obj = PasswordResetOTP.generate_otp(user)
-    
-    # Send email with OTP
-    subject = "Book Recommendation System - Password Reset OTP"
-    message = f"""
-    Hello {user.first_name},
-    
-    We received a request to reset your password for your Book Recommendation System account.
-    
-    Your OTP is: {otp_obj.otp}
-    
-    This OTP is valid for 10 minutes. If you didn't request this, please ignore this email.
-    
-    Thank you,
-    Book Recommendation System Team
-    """
-    
-    from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', None) or getattr(settings, 'EMAIL_HOST_USER', None)
-    logger.info("send_otp_email: Using from_email=%s, to=%s", from_email, user.email)
-    recipient_list = [user.email]
-    
+    _check_otp_rate_limit(user.id)
+
+    lock_key = f"otp:lock:user:{user.id}"
+    if not cache.add(lock_key, 1, OTP_LOCK_TTL):
+        # Another worker is already generating for this user (double-click,
+        # concurrent tabs); wait briefly and reuse its OTP
+        existing = _wait_for_concurrent_otp(user)
+        if existing is not None:
+            return existing
+        # Lock holder failed or was too slow; fall through and generate our own
+
     try:
-        sent_count = send_mail(
-            subject,
-            message,
-            from_email,
-            recipient_list,
-            fail_silently=False
-        )
-        logger.info("send_otp_email: send_mail returned count=%s", sent_count)
-        logger.info("send_otp_email: Generated OTP id=%s for user=%s", otp_obj.id, user.email)
+        # OTP and its outbox row commit together: once the transaction lands,
+        # the email is guaranteed to go out eventually (immediately via the
+        # task below, or via drain_email_outbox if the broker/SMTP is down)
+        with transaction.atomic():
+            otp_obj = PasswordResetOTP.generate_otp(user)
+            outbox = EmailOutbox.objects.create(
+                recipient=user.email,
+                template='otp',
+                context_json={'user_id': user.id, 'otp_id': otp_obj.id},
+            )
+        cache.set(f"otp:last:user:{user.id}", otp_obj.id, OTP_LAST_TTL)
+        # Publish only after the rows are durable: if a worker grabs the task
+        # before our commit (or the transaction rolls back) it would see
+        # nothing to send
+        transaction.on_commit(lambda: _enqueue_otp_send(user.id, otp_obj.id, outbox.id))
+        logger.debug("send_otp_email: queued OTP id=%s for user=%s", otp_obj.id, user.email)
         return otp_obj
-    except Exception as e:
-        # Log the error but keep OTP to allow retry without re-generating
-        logger.exception("send_otp_email: Failed to send email for user=%s", user.email)
-        raise e
\ No newline at end of file
+    finally:
+        # TTL bounds staleness if this delete is lost
+        cache.delete(lock_key)
+
+
+def _enqueue_otp_send(user_id, otp_id, outbox_id):
+    try:
+        send_otp_email_task.delay(user_id, otp_id, outbox_id)
+    except Exception:
+        # Broker unavailable: the outbox drainer will deliver it
+        logger.warning("send_otp_email: could not enqueue OTP id=%s, left in outbox", otp_id)
+
+
+def _wait_for_concurrent_otp(user, attempts=3, delay=0.2):
+    """Poll for the OTP a concurrent request is generating; None if it never lands."""
+    for _ in range(attempts):
+        time.sleep(delay)
+        otp_id = cache.get(f"otp:last:user:{user.id}")
+        if otp_id:
+            try:
+                return PasswordResetOTP.objects.get(id=otp_id, user_id=user.id)
+            except PasswordResetOTP.DoesNotExist:
+                return None
+    return None
+
+
+def send_otp_emails_bulk(users):
+    """
+    Generate OTPs for several users and queue one batched send that shares a
+    single SMTP session, instead of one connection per recipient.
+
+    Returns the list of PasswordResetOTP instances.
+    """
+    otp_objs = [PasswordResetOTP.generate_otp(user) for user in users]
+    if otp_objs:
+        send_otp_emails_bulk_task.delay([o.id for o in otp_objs])
+    return otp_objs
@@ -1,26 +1,31 @@
 from __future__ import annotations
+from functools import lru_cache
 from typing import Optional
 from supabase import create_client, Client
 from django.conf import settings
 
-_supabase_client: Optional[Client] = None
 
+@lru_cache(maxsize=1)
 def get_supabase() -> Client:
-    """Return a singleton Supabase client using settings.SUPABASE_URL/KEY.
+    """Return the process-wide Supabase client, created on first use.
+
+    lru_cache makes the lazy init thread-safe: concurrent worker threads get
+    one client (and one connection pool) instead of racing the old
+    global-variable check and each opening their own.
     Raises a clear error if configuration is missing.
     """
-    global _supabase_client
-    if _supabase_client is not None:
-        return _supabase_client
-
     url = getattr(settings, 'SUPABASE_URL', None)
     key = getattr(settings, 'SUPABASE_KEY', None)
     if not url or not key:
         raise RuntimeError(
             'Supabase is not configured. Set SUPABASE_URL and SUPABASE_KEY in your .env.'
         )
-    _supabase_client = create_client(url, key)
-    return _supabase_client
+    return create_client(url, key)
+
+
+@lru_cache(maxsize=8)
+def _bucket(bucket_name: str):
+    return get_supabase().storage.from_(bucket_name)
 
 
 def get_storage_bucket(name: Optional[str] = None):
@@ -30,5 +35,4 @@ def get_storage_bucket(name: Optional[str] = None):
     bucket_name = name or getattr(settings, 'SUPABASE_BUCKET', None)
     if not bucket_name:
         raise RuntimeError('No bucket name provided. Set SUPABASE_BUCKET in .env or pass name.')
-    client = get_supabase()
-    return client.storage.from_(bucket_name)
+    return _bucket(bucket_name)
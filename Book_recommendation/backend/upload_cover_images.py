@@ -1,45 +1,84 @@
 import os
 import cloudinary
 import cloudinary.uploader
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 # Load environment variables from .env
 load_dotenv()
 
+# Pull config once and fail fast: the old per-upload
+# os.getenv('CLOUDINARY_UPLOAG_PRESET') (note the typo) silently sent None
+# to Cloudinary on every request
+UPLOAD_PRESET = os.getenv('CLOUDINARY_UPLOAD_PRESET') or os.getenv('CLOUDINARY_UPLOAG_PRESET')
+if not UPLOAD_PRESET:
+    raise SystemExit('CLOUDINARY_UPLOAD_PRESET is not set')
+
 # Configure Cloudinary
 cloudinary.config(
-    cloud_name=os.getenv('CLOUDINARY_CLOUD_NAME'),
-    api_key=os.getenv('CLOUDINARY_API_KEY'),
-    api_secret=os.getenv('CLOUDINARY_API_SECRET')
+    cloud_name=os.environ['CLOUDINARY_CLOUD_NAME'],
+    api_key=os.environ['CLOUDINARY_API_KEY'],
+    api_secret=os.environ['CLOUDINARY_API_SECRET']
 )
 
 # Directory containing cover images
 image_dir = '../archive/cover_images'
 
-# List to store results
-results = []
-
-# Upload each image
-for filename in os.listdir(image_dir):
-    if filename.lower().endswith(('.jpg', '.jpeg', '.png', '.webp')):
-        filepath = os.path.join(image_dir, filename)
-        try:
-            # Upload to Cloudinary
-            upload_result = cloudinary.uploader.upload(
-                filepath,
-                upload_preset=os.getenv('CLOUDINARY_UPLOAG_PRESET'),
-                public_id=filename.split('.')[0],  # Use filename without extension as public_id
-                folder='book_covers'  # Optional: organize in a folder
-            )
-            url = upload_result['secure_url']
-            results.append(f"{filename}: {url}")
-            print(f"Uploaded {filename}: {url}")
-        except Exception as e:
-            print(f"Failed to upload {filename}: {e}")
-
-# Write results to txt file
-with open('cover_image_urls.txt', 'w') as f:
-    for result in results:
-        f.write(result + '\n')
-
-print("Upload complete. Results saved to cover_image_urls.txt")
+# Results file doubles as the resume log: reruns skip anything already in it
+results_file = 'cover_image_urls.txt'
+
+# Lowercasing just the extension beats lowercasing every filename in the scan
+IMAGE_EXTS = frozenset({'.jpg', '.jpeg', '.png', '.webp'})
+
+# Each upload is an HTTPS round-trip, so the work is I/O-bound: threads
+# overlap the socket waits and cut wall time roughly by the worker count
+MAX_WORKERS = int(os.getenv('UPLOAD_CONCURRENCY', '16'))
+
+
+def upload_one(filename):
+    """Upload one cover to Cloudinary; returns (filename, url or None)."""
+    filepath = os.path.join(image_dir, filename)
+    try:
+        upload_result = cloudinary.uploader.upload(
+            filepath,
+            upload_preset=UPLOAD_PRESET,
+            public_id=filename.split('.')[0],  # Use filename without extension as public_id
+            folder='book_covers'  # Optional: organize in a folder
+        )
+        url = upload_result['secure_url']
+        print(f"Uploaded {filename}: {url}")
+        return filename, url
+    except Exception as e:
+        # One failed upload must not cancel the rest of the batch
+        print(f"Failed to upload {filename}: {e}")
+        return filename, None
+
+
+# Filenames recorded on a previous run; uploading them again would only
+# burn network and Cloudinary quota
+already_uploaded = set()
+if os.path.exists(results_file):
+    with open(results_file) as f:
+        already_uploaded = {line.split(':', 1)[0] for line in f if ':' in line}
+
+# scandir streams directory entries instead of materializing the whole
+# listing, and is_file() uses the stat info the kernel already returned
+def pending_files():
+    with os.scandir(image_dir) as it:
+        for entry in it:
+            if (entry.is_file()
+                    and os.path.splitext(entry.name)[1].lower() in IMAGE_EXTS
+                    and entry.name not in already_uploaded):
+                yield entry.name
+
+
+uploaded = 0
+# Append + flush per result so an interrupted run preserves its progress
+with open(results_file, 'a') as f, ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+    for filename, url in executor.map(upload_one, pending_files()):
+        if url:
+            f.write(f"{filename}: {url}\n")
+            f.flush()
+            uploaded += 1
+
+print(f"Upload complete. {uploaded} new results saved to {results_file}")
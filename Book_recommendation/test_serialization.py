@@ -1,4 +1,6 @@
 import os
+import sys
+
 import django
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
@@ -7,23 +9,31 @@ django.setup()
 from books.models import User
 from books.serializers import UserDetailSerializer
 
-# Get all users
-users = list(User.objects.all())
+# Get all users; project only the columns the serializer reads and prefetch
+# the genres it nests, so the check costs two queries however many users exist
+users = list(
+    User.objects.prefetch_related('favorite_genres').only(
+        'id', 'first_name', 'last_name', 'username', 'email', 'is_admin',
+        'is_superuser', 'preferred_language', 'saved_book_ids',
+        'created_at', 'updated_at',
+    )
+)
 print(f"Found {len(users)} users")
 
-# Try to serialize each one
-success = True
-for user in users:
-    try:
-        serializer = UserDetailSerializer(user)
-        data = serializer.data
-        print(f"User {user.id}: {user.email} - OK")
-    except Exception as e:
-        print(f"User {user.id}: {user.email} - ERROR: {e}")
-        success = False
-        break
-
-if success:
-    print("\nAll users serialized successfully! The admin users endpoint should now work.")
-else:
+# One many=True pass instead of a serializer instance per row; only when it
+# fails do we drop to the per-row loop to name the offending user
+try:
+    UserDetailSerializer(users, many=True).data
+except Exception:
+    for user in users:
+        try:
+            UserDetailSerializer(user).data
+        except Exception as e:
+            print(f"User {user.id}: {user.email} - ERROR: {e}")
+            break
     print("\nSome users still failing serialization - check the error above.")
+else:
+    # Buffer the per-user lines into one write instead of a syscall per row
+    lines = [f"User {user.id}: {user.email} - OK" for user in users]
+    sys.stdout.write("\n".join(lines) + "\n")
+    print("\nAll users serialized successfully! The admin users endpoint should now work.")
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class AdminUserConfig(AppConfig):
     name = 'admin_user'
+
+    def ready(self):
+        from . import caches  # noqa: F401  registers cache-invalidation receivers
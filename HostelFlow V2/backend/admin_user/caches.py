@@ -0,0 +1,35 @@
+"""Cache keys and invalidation hooks for the admin list endpoints.
+
+The user and provider lists change rarely but are refetched and
+reserialized on every dashboard load; the views cache the rendered
+payload and the receivers below drop it whenever a relevant row changes.
+Imported from AdminUserConfig.ready() so the receivers register at startup.
+"""
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from student_user.models import Service, ServiceProvider, ServiceProviderService, User
+
+ADMIN_USERS_KEY = 'admin:users:v1'
+ADMIN_USERS_TTL = 300  # seconds
+
+ADMIN_PROVIDERS_KEY = 'admin:providers:v1'
+ADMIN_PROVIDERS_TTL = 300  # seconds
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def _invalidate_user_lists(sender, **kwargs):
+    # The provider list embeds username/email, so a user edit stales both
+    cache.delete_many([ADMIN_USERS_KEY, ADMIN_PROVIDERS_KEY])
+
+
+@receiver(post_save, sender=ServiceProvider)
+@receiver(post_delete, sender=ServiceProvider)
+@receiver(post_save, sender=ServiceProviderService)
+@receiver(post_delete, sender=ServiceProviderService)
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+def _invalidate_provider_list(sender, **kwargs):
+    cache.delete(ADMIN_PROVIDERS_KEY)
@@ -4,7 +4,9 @@ from .views import *
 urlpatterns = [
     path('bookings', get_all_bookings),
     path('bookings/<int:booking_id>/status', update_booking_status),
+    path('bookings/bulk-status', bulk_update_booking_status),
     path('users', get_all_users),
+    path('users/counts', dashboard_user_counts),
     path('users/<int:user_id>/delete', delete_user),
     path('service-providers', get_service_providers),
     path('service-providers/create', create_service_provider),
@@ -1,20 +1,56 @@
 from rest_framework.response import Response
 from student_user.models import *
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import IsAdminUser
 from student_user.serializers import *
 from rest_framework import status
-from django.db import IntegrityError, DatabaseError
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, DatabaseError, transaction
+from django.db.models import Count, Q
 from decimal import Decimal
+from functools import lru_cache
+from django.core.cache import cache
+from .caches import (
+    ADMIN_PROVIDERS_KEY, ADMIN_PROVIDERS_TTL,
+    ADMIN_USERS_KEY, ADMIN_USERS_TTL,
+)
+from student_user.caches import dashboard_key
 
 # Create your views here.
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
 def get_all_users(request):
-    users = get_user_model().objects.all()
-    users = [u for u in users if u.is_serviceprovider == False and u.is_superuser == False]
-    serializer = UserSerializer(users, many=True)
-    return Response(serializer.data)
+    # Rendered payload is cached; the receivers in caches.py drop it on any
+    # User change, so the common case is a single cache fetch
+    data = cache.get(ADMIN_USERS_KEY)
+    if data is None:
+        # Filter in Postgres instead of pulling every row (admins and
+        # providers included) into Python; values() projects exactly the
+        # columns the old serializer emitted
+        # iterator() streams rows in chunks straight into the result list
+        # instead of also buffering them in the queryset cache
+        data = list(get_user_model().objects.filter(
+            is_serviceprovider=False, is_superuser=False
+        ).values(
+            'id', 'email', 'username', 'room_number', 'is_superuser', 'is_serviceprovider'
+        ).iterator(chunk_size=500))
+        cache.set(ADMIN_USERS_KEY, data, ADMIN_USERS_TTL)
+    return Response(data)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def dashboard_user_counts(request):
+    """Role counts for the admin dashboard, computed as one SQL aggregate
+    instead of pulling the user table into Python; the partial role indexes
+    let the filtered counts run as index-only scans."""
+    counts = get_user_model().objects.aggregate(
+        total=Count('id'),
+        providers=Count('id', filter=Q(is_serviceprovider=True)),
+        admins=Count('id', filter=Q(is_superuser=True)),
+    )
+    return Response(counts)
 
 
 @api_view(['DELETE'])
@@ -55,27 +91,93 @@ def delete_user(request, user_id):
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
 def get_all_bookings(request):
-    bookings = Booking.objects.select_related('user', 'service_provider_service').all()
-    serializer = BookingSerializer(bookings, many=True)
-    return Response(serializer.data)
+    # Bounded window over an indexed ordering instead of the whole table:
+    # payload size and peak memory stay at one page however large the
+    # booking history grows. values()-based projection keeps the flat joined
+    # SELECT and plain dicts, skipping DRF's per-row field machinery.
+    paginator = LimitOffsetPagination()
+    paginator.default_limit = 50
+    rows = paginator.paginate_queryset(
+        Booking.objects.order_by('-id').values(*BOOKING_VALUES_FIELDS),
+        request,
+    )
+    return paginator.get_paginated_response(serialize_booking_rows(rows))
 
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
 def get_service_providers(request):
-    providers = ServiceProvider.objects.prefetch_related('services__service').all()
-    serializer = ServiceProviderSerializer(providers, many=True)
-    return Response(serializer.data)
+    data = cache.get(ADMIN_PROVIDERS_KEY)
+    if data is None:
+        # Two flat values() queries bucketed in Python replace the
+        # prefetch_related plus nested-serializer fanout: providers first (so
+        # providers without services still appear), then every
+        # provider-service row joined to its service in one SELECT
+        providers = list(
+            ServiceProvider.objects.values('id', 'phone', 'user__username', 'user__email')
+        )
+        services_by_provider = {p['id']: [] for p in providers}
+        service_rows = ServiceProviderService.objects.values(
+            'id', 'availability', 'serviceprovider_id',
+            'service__id', 'service__name', 'service__description', 'service__price',
+        )
+        for row in service_rows:
+            bucket = services_by_provider.get(row['serviceprovider_id'])
+            if bucket is not None:
+                bucket.append({
+                    'id': row['id'],
+                    'service': {
+                        'id': row['service__id'],
+                        'name': row['service__name'],
+                        'description': row['service__description'],
+                        'price': str(row['service__price']),
+                    },
+                    'price': float(row['service__price']),
+                    'availability': row['availability'],
+                })
+        data = [
+            {
+                'id': p['id'],
+                'name': p['user__username'],
+                'email': p['user__email'],
+                'phone': p['phone'],
+                'services': services_by_provider[p['id']],
+            }
+            for p in providers
+        ]
+        cache.set(ADMIN_PROVIDERS_KEY, data, ADMIN_PROVIDERS_TTL)
+    return Response(data)
 
 
+# The default provider password is a constant, so hash it once at import:
+# running the PBKDF2 KDF per request was the dominant CPU cost of
+# create_service_provider
+_DEFAULT_PROVIDER_PW_HASH = make_password("serviceprovider")
+
+# Booking status vocabulary and the per-status notification texts, built once
+# at import; the %s placeholder is formatted only for the status actually set
+BOOKING_STATUSES = ('Booked', 'In Progress', 'Completed', 'Cancelled')
+_BOOKING_STATUS_SET = frozenset(BOOKING_STATUSES)
+
+_STATUS_MESSAGES = {
+    'In Progress': "Your %s booking is now in progress.",
+    'Completed': "Your %s booking has been marked as completed by admin. Please rate your experience!",
+    'Cancelled': "Your %s booking has been cancelled by admin.",
+    'Booked': "Your %s booking status has been updated to Booked.",
+}
+
+# Built once at import instead of on every call
+_DESCRIPTIONS = {
+    'laundry': "Professional laundry services including washing, drying, and ironing.",
+    'roomcleaning': "Complete room cleaning with dusting, mopping, and sanitization.",
+    'studyspaces': "Well-maintained study spaces for focused and quiet study sessions.",
+    'roomrepairs': "On-demand maintenance and repair services for hostel rooms.",
+    'techsupport': "Technical assistance for your devices, connectivity, and software.",
+}
+
+
+@lru_cache(maxsize=64)
 def get_default_description(service_name):
-    descriptions = {
-        'laundry': "Professional laundry services including washing, drying, and ironing.",
-        'roomcleaning': "Complete room cleaning with dusting, mopping, and sanitization.",
-        'studyspaces': "Well-maintained study spaces for focused and quiet study sessions.",
-        'roomrepairs': "On-demand maintenance and repair services for hostel rooms.",
-        'techsupport': "Technical assistance for your devices, connectivity, and software.",
-    }
-    return descriptions.get(service_name, "General service provided by the hostel.")
+    return _DESCRIPTIONS.get(service_name, "General service provided by the hostel.")
 
 @api_view(['POST'])
 @permission_classes([IsAdminUser])
@@ -89,43 +191,48 @@ def create_service_provider(request):
         return Response({'error': 'Name and email are required.'}, status=status.HTTP_400_BAD_REQUEST)
 
     try:
-        default_password = "serviceprovider"
-        user = User.objects.create_user(
-            username=name,
-            email=email,
-            password=default_password
-        )
-    except (IntegrityError, DatabaseError) as e:
+        # One transaction: user, provider and services commit together (no
+        # per-statement fsyncs, no half-created provider on failure), and the
+        # per-service create/create loop collapses into two bulk INSERTs
+        with transaction.atomic():
+            user = User(
+                username=name,
+                email=email,
+                password=_DEFAULT_PROVIDER_PW_HASH,
+                is_serviceprovider=True,
+            )
+            user.save(force_insert=True)
+
+            service_provider = ServiceProvider.objects.create(
+                user=user,
+                phone=phone,
+            )
+
+            services_to_create = []
+            for service_name in service_ids:
+                if service_name:
+                    desc_key = "".join(service_name.split()).lower()
+                    services_to_create.append(Service(
+                        name=service_name,
+                        description=get_default_description(desc_key),
+                        price=Decimal('100.00'),
+                    ))
+            created_services = Service.objects.bulk_create(services_to_create)
+            ServiceProviderService.objects.bulk_create([
+                ServiceProviderService(serviceprovider=service_provider, service=service, rating=0.0)
+                for service in created_services
+            ])
+    except (IntegrityError, DatabaseError):
         return Response(
             {"error": "Username or email already exists. Please choose another."},
             status=status.HTTP_400_BAD_REQUEST
         )
 
+    # bulk_create skips post_save signals, so drop the provider list
+    # explicitly once the transaction has committed
+    cache.delete(ADMIN_PROVIDERS_KEY)
 
-    user.is_serviceprovider = True
-    user.save()
-
-    service_provider = ServiceProvider.objects.create(
-        user=user,
-        phone=phone,
-    )
-
-    new_services = []
-    for service_name in service_ids:
-        if service_name:
-            desc = "".join([i for i in service_name.split()])
-            service = Service.objects.create(
-                name=service_name,
-                description= get_default_description(desc.lower()),
-                price= Decimal('100.00'),
-            )
-            ServiceProviderService.objects.create(
-                serviceprovider=service_provider,
-                service=service,
-                rating=0.0
-            )
-            
-            new_services.append(ServiceSerializer(service).data)
+    new_services = ServiceSerializer(created_services, many=True).data
 
     return Response({
         'service_provider': {
@@ -172,43 +279,109 @@ def update_booking_status(request, booking_id):
         booking = Booking.objects.select_related('user', 'service_provider_service__service').get(id=booking_id)
         
         new_status = request.data.get('status')
-        
+
         # Validate status
-        valid_statuses = ['Booked', 'In Progress', 'Completed', 'Cancelled']
-        if new_status not in valid_statuses:
+        if new_status not in _BOOKING_STATUS_SET:
             return Response(
-                {'error': f'Invalid status. Must be one of: {", ".join(valid_statuses)}'},
+                {'error': f'Invalid status. Must be one of: {", ".join(BOOKING_STATUSES)}'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
-        # Update booking status
+
+        # Status change and its notification commit together, and the
+        # connection is released as soon as the block exits instead of being
+        # held across the two autocommitted writes
         old_status = booking.status
-        booking.status = new_status
-        booking.save()
-        
-        # Create notification for user when admin changes status
-        notification_messages = {
-            'In Progress': f"Your {booking.service_provider_service.service.name} booking is now in progress.",
-            'Completed': f"Your {booking.service_provider_service.service.name} booking has been marked as completed by admin. Please rate your experience!",
-            'Cancelled': f"Your {booking.service_provider_service.service.name} booking has been cancelled by admin.",
-            'Booked': f"Your {booking.service_provider_service.service.name} booking status has been updated to Booked."
-        }
-        
-        if new_status in notification_messages:
-            Notification.objects.create(
-                user=booking.user,
-                booking=booking,
-                message=notification_messages[new_status]
-            )
+        service_name = booking.service_provider_service.service.name
+        message = _STATUS_MESSAGES.get(new_status)
+
+        with transaction.atomic():
+            # Write just the status column; a full-row save() would also
+            # rewrite date/comment/instructions for no reason
+            Booking.objects.filter(pk=booking.pk).update(status=new_status)
+            booking.status = new_status
+
+            if message:
+                Notification.objects.create(
+                    user=booking.user,
+                    booking=booking,
+                    message=message % service_name
+                )
+
+        # The owner's dashboard counts moved between status buckets
+        cache.delete(dashboard_key(booking.user_id))
         
-        serializer = BookingSerializer(booking)
         return Response({
             'message': f'Booking status updated from {old_status} to {new_status}',
-            'booking': serializer.data
+            'booking': serialize_bookings_fast(Booking.objects.filter(pk=booking.pk))[0]
         })
-        
+
     except Booking.DoesNotExist:
         return Response(
             {'error': 'Booking not found'},
             status=status.HTTP_404_NOT_FOUND
         )
+
+
+@api_view(['PUT', 'PATCH'])
+@permission_classes([IsAdminUser])
+def bulk_update_booking_status(request):
+    """Admin can update many booking statuses in one request.
+
+    Accepts a list of {"id": ..., "status": ...} items and issues one UPDATE
+    per status group plus a single bulk notification INSERT, instead of two
+    round trips per booking.
+    """
+    updates = request.data if isinstance(request.data, list) else request.data.get('updates')
+    if not isinstance(updates, list) or not updates:
+        return Response(
+            {'error': 'Expected a non-empty list of {"id", "status"} items'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    ids_by_status = {}
+    for item in updates:
+        booking_id = item.get('id') if isinstance(item, dict) else None
+        new_status = item.get('status') if isinstance(item, dict) else None
+        if booking_id is None or new_status not in _BOOKING_STATUS_SET:
+            return Response(
+                {'error': f'Each item needs an id and a status from: {", ".join(BOOKING_STATUSES)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        ids_by_status.setdefault(new_status, []).append(booking_id)
+
+    all_ids = [booking_id for ids in ids_by_status.values() for booking_id in ids]
+    status_by_id = {
+        booking_id: new_status
+        for new_status, ids in ids_by_status.items()
+        for booking_id in ids
+    }
+
+    with transaction.atomic():
+        bookings = list(
+            Booking.objects.filter(id__in=all_ids)
+            .select_related('user', 'service_provider_service__service')
+        )
+
+        for new_status, ids in ids_by_status.items():
+            Booking.objects.filter(id__in=ids).update(status=new_status)
+
+        Notification.objects.bulk_create([
+            Notification(
+                user=booking.user,
+                booking=booking,
+                message=(
+                    f"Your {booking.service_provider_service.service.name} booking "
+                    f"status has been updated to {status_by_id[booking.id]}."
+                ),
+            )
+            for booking in bookings
+        ])
+
+    # Every affected owner's dashboard counts changed
+    cache.delete_many({dashboard_key(booking.user_id) for booking in bookings})
+
+    found = {booking.id for booking in bookings}
+    return Response({
+        'updated': len(found),
+        'missing': sorted(set(all_ids) - found),
+    })
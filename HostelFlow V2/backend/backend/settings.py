@@ -76,6 +76,9 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'backend.renderers.ORJSONRenderer',
+    ),
 }
 
 ROOT_URLCONF = 'backend.urls'
@@ -114,6 +117,12 @@ DATABASES = {
     )
 }
 
+# Set DB_POOLED=true when a transaction-pooling PgBouncer fronts Postgres:
+# server-side cursors outlive the transaction and break under that pool mode
+DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = (
+    os.getenv('DB_POOLED', '').lower() in ('1', 'true', 'yes')
+)
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -263,6 +272,30 @@ if DEBUG and (not EMAIL_HOST_USER or not EMAIL_HOST_PASSWORD):
     EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
 
+# Logging: app chatter goes through loggers so production (INFO) skips the
+# debug formatting entirely, unlike print() which always writes
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'root': {'handlers': ['console'], 'level': 'WARNING'},
+    'loggers': {
+        'student_user': {
+            'handlers': ['console'],
+            'level': 'DEBUG' if DEBUG else 'INFO',
+            'propagate': False,
+        },
+        'admin_user': {
+            'handlers': ['console'],
+            'level': 'DEBUG' if DEBUG else 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+
 # JWT Configuration
 from datetime import timedelta
 
@@ -19,6 +19,7 @@ Usage:
     supabase.table('bookings').on('INSERT', callback).subscribe()
 """
 
+import threading
 from typing import Optional
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
@@ -38,15 +39,21 @@ class SupabaseClient:
     """
     _instance: Optional[Client] = None
     _initialized: bool = False
+    _lock = threading.Lock()
 
     @classmethod
     def get_client(cls) -> Client:
         """
         Get or create the Supabase client instance.
-        
+
+        Uses double-checked locking: the fast path is a single attribute load
+        with no lock, and the lock is only taken while the client is being
+        built so concurrent first-callers cannot each open their own
+        connection pool.
+
         Returns:
             Client: Supabase client instance
-            
+
         Raises:
             ImproperlyConfigured: If Supabase credentials are not set or library not installed
         """
@@ -55,27 +62,34 @@ class SupabaseClient:
                 'supabase-py is not installed. Install it with: pip install supabase'
             )
 
-        if cls._instance is None or not cls._initialized:
-            url = settings.SUPABASE_URL
-            key = settings.SUPABASE_KEY
-
-            if not url or not key:
-                raise ImproperlyConfigured(
-                    'SUPABASE_URL and SUPABASE_KEY must be set in settings. '
-                    'Add them to your .env file:\n'
-                    'SUPABASE_URL=https://your-project.supabase.co\n'
-                    'SUPABASE_KEY=your-anon-key'
-                )
-
-            try:
-                cls._instance = create_client(url, key)
-                cls._initialized = True
-            except Exception as e:
-                raise ImproperlyConfigured(
-                    f'Failed to initialize Supabase client: {str(e)}'
-                )
-
-        return cls._instance
+        instance = cls._instance
+        if instance is not None:
+            return instance
+
+        with cls._lock:
+            # Re-check under the lock: another thread may have built the
+            # client while we were waiting
+            if cls._instance is None:
+                url = settings.SUPABASE_URL
+                key = settings.SUPABASE_KEY
+
+                if not url or not key:
+                    raise ImproperlyConfigured(
+                        'SUPABASE_URL and SUPABASE_KEY must be set in settings. '
+                        'Add them to your .env file:\n'
+                        'SUPABASE_URL=https://your-project.supabase.co\n'
+                        'SUPABASE_KEY=your-anon-key'
+                    )
+
+                try:
+                    cls._instance = create_client(url, key)
+                    cls._initialized = True
+                except Exception as e:
+                    raise ImproperlyConfigured(
+                        f'Failed to initialize Supabase client: {str(e)}'
+                    )
+
+            return cls._instance
 
     @classmethod
     def reset(cls):
@@ -0,0 +1,41 @@
+"""Cache keys and invalidation hooks for the student-facing endpoints.
+
+The service catalog changes only when an admin edits providers, yet every
+booking page load refetched and reserialized it; the view caches the
+rendered list and the receiver below drops it on any Service write.
+Imported from StudentUserConfig.ready() so the receivers register at startup.
+"""
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Service
+
+SERVICES_KEY = 'services:all'
+SERVICES_TTL = 300  # seconds
+
+# Slot pickers poll the unavailable-slot endpoint while the user decides;
+# the set only changes on booking writes, which delete the key explicitly.
+# Today's entry expires faster because the past-slot filter moves with the
+# clock rather than with the data.
+UNAVAILABLE_SLOTS_TTL = 30  # seconds
+UNAVAILABLE_SLOTS_TODAY_TTL = 10  # seconds
+
+
+def unavailable_slots_key(service_id, date_iso):
+    return f'unavail:{service_id}:{date_iso}'
+
+
+# Dashboards are polled by the same user every few seconds; the short TTL
+# bounds staleness and booking writes delete the key outright
+DASHBOARD_TTL = 30  # seconds
+
+
+def dashboard_key(user_id):
+    return f'dash:{user_id}'
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+def _invalidate_service_list(sender, **kwargs):
+    cache.delete(SERVICES_KEY)
@@ -0,0 +1,33 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student_user', '0004_user_role_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='booking',
+            name='date',
+            field=models.DateField(db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='booking',
+            name='status',
+            field=models.CharField(
+                choices=[('Booked', 'Booked'), ('In Progress', 'In Progress'),
+                         ('Completed', 'Completed'), ('Cancelled', 'Cancelled')],
+                db_index=True, default='Booked', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='read',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'read'], name='notif_user_read_idx'),
+        ),
+    ]
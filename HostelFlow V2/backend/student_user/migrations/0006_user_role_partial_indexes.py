@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student_user', '0005_booking_notification_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(is_serviceprovider=True), fields=['id'],
+                               name='user_provider_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(is_superuser=True), fields=['id'],
+                               name='user_admin_idx'),
+        ),
+    ]
@@ -12,6 +12,17 @@ class User(AbstractUser):
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["username"]  # keep username for AbstractUser compatibility
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["is_serviceprovider", "is_superuser"], name="user_role_idx"),
+            # Providers and admins are small subsets; partial indexes keep the
+            # filtered dashboard counts index-only
+            models.Index(fields=["id"], condition=models.Q(is_serviceprovider=True),
+                         name="user_provider_idx"),
+            models.Index(fields=["id"], condition=models.Q(is_superuser=True),
+                         name="user_admin_idx"),
+        ]
+
     def __str__(self):
         return self.email
 
@@ -76,10 +87,10 @@ class Booking(models.Model):
     service_provider_service = models.ForeignKey(
         ServiceProviderService, on_delete=models.CASCADE, related_name="bookings"
     )
-    date = models.DateField()
+    date = models.DateField(db_index=True)
     time_slot = models.CharField(max_length=20, choices=SERVICE_TIMES)
     special_instructions = models.TextField(blank=True)
-    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="Booked")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="Booked", db_index=True)
     comment = models.TextField(blank=True)
 
     def __str__(self):
@@ -87,6 +98,17 @@ class Booking(models.Model):
 
     class Meta:
         unique_together = ("service_provider_service", "date", "time_slot")
+        indexes = [
+            # dashboard_stats: per-user counts bucketed by status
+            models.Index(fields=["user", "status"], name="booking_user_status_idx"),
+            # fetch_bookings: per-user list ordered by -date, -id
+            models.Index(fields=["user", "-date", "-id"], name="booking_user_date_idx"),
+            # service_provider_bookings: per-provider-service list, same order.
+            # The plain (service_provider_service, date) lookup is already
+            # covered by the unique_together index prefix.
+            models.Index(fields=["service_provider_service", "-date", "-id"],
+                         name="booking_sps_date_idx"),
+        ]
 
 
 # ---------------- NOTIFICATION ----------------
@@ -95,10 +117,18 @@ class Notification(models.Model):
     message = models.TextField()
     booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name="notifications", null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
-    read = models.BooleanField(default=False)
+    read = models.BooleanField(default=False, db_index=True)
 
     def __str__(self):
         return f"Notification for {self.user.email}: {self.message[:30]}"
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Serves the per-user unread badge and mark-all-read UPDATE
+            models.Index(fields=["user", "read"], name="notif_user_read_idx"),
+            # Unread rows are the small working set; the partial index keeps
+            # those lookups O(unread) regardless of read history size
+            models.Index(fields=["user"], condition=models.Q(read=False),
+                         name="notif_unread_idx"),
+        ]
